@@ -0,0 +1,36 @@
+"""
+Helpers for building the STREAM executable.
+
+Shared by setup.py and StreamBenchmark, so this module must only use the
+standard library: setup.py loads it straight from the source tree before
+any dependencies are installed.
+"""
+
+import os
+import subprocess
+from typing import List
+
+
+def run_make(cmd: List[str], cwd: str):
+    """
+    Run a make command, discarding its output unless PYSTREAM_VERBOSE is set.
+    
+    Args:
+        cmd: The make command line.
+        cwd: Directory to run make in.
+        
+    Raises:
+        RuntimeError: If make fails, with the captured stderr in the message.
+    """
+    verbose = bool(os.environ.get("PYSTREAM_VERBOSE"))
+    result = subprocess.run(
+        cmd,
+        cwd=cwd,
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.PIPE,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"'{' '.join(cmd)}' failed with code {result.returncode}: {result.stderr or ''}".rstrip()
+        )
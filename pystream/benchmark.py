@@ -7,19 +7,156 @@ controlled memory bandwidth pressure.
 """
 
 import os
+import ctypes.util
 import subprocess
 import signal
+import select
 import time
 import enum
 import threading
 import atexit
+import contextlib
+import functools
+import platform
 import psutil
 import logging
 import sys
 from typing import Optional, Dict, List, Union, Tuple, Set, Sequence
 
+from ._build import run_make
+
 logger = logging.getLogger(__name__)
 
+# Units for the /proc/<pid>/stat fields read by get_resource_usage
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# psutil attribute names get_resource_usage can be restricted to
+_USAGE_ATTRS = ("cpu_percent", "memory_info", "io_counters")
+
+# SIMD builds of the executable setup.py may place next to it as
+# stream.<tag> on x86-64, best first, with the CPU flags each one needs
+_SIMD_VARIANTS = (
+    ("avx512", frozenset({"avx512f", "avx512dq"})),
+    ("avx2", frozenset({"avx2", "fma"})),
+)
+
+@functools.lru_cache(maxsize=None)
+def _cpu_flags() -> frozenset:
+    """Return the CPU feature flags from /proc/cpuinfo, empty if unavailable."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return frozenset(line.partition(":")[2].split())
+    except OSError:
+        pass
+    return frozenset()
+
+class _ProcStats:
+    """Persistent /proc/<pid>/stat and /proc/<pid>/io descriptors of one process."""
+    
+    def __init__(self, pid: int):
+        # Raises OSError where there is no procfs (non-Linux)
+        self.stat_fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY)
+        try:
+            self.io_fd = os.open(f"/proc/{pid}/io", os.O_RDONLY)
+        except OSError:
+            self.io_fd = None
+        # (cpu ticks, monotonic ns) at the last sample. The process has used
+        # no CPU time yet, so the first sample reports the average since start
+        self.cpu_sample = (0, time.monotonic_ns())
+    
+    def read(self, io: bool = True) -> Optional[Tuple[bytes, bytes, int]]:
+        """
+        Read the raw contents of the stat and io files.
+        
+        Args:
+            io: Whether to read the io file too.
+            
+        Returns:
+            Tuple of (stat contents, io contents, monotonic timestamp in ns),
+            or None if the process has already been reaped.
+        """
+        try:
+            stat = os.pread(self.stat_fd, 1024, 0)
+        except OSError:
+            return None
+        data = b""
+        if io and self.io_fd is not None:
+            try:
+                data = os.pread(self.io_fd, 512, 0)
+            except OSError:
+                pass
+        return stat, data, time.monotonic_ns()
+    
+    def parse(self, stat: bytes, io: bytes, now: int,
+              attrs: Sequence[str] = _USAGE_ATTRS) -> Dict[str, float]:
+        """
+        Turn the raw contents returned by read() into resource usage.
+        
+        Args:
+            stat: Contents of /proc/<pid>/stat.
+            io: Contents of /proc/<pid>/io, empty if unavailable.
+            now: Monotonic timestamp of the read in nanoseconds.
+            attrs: Which of _USAGE_ATTRS to compute.
+            
+        Returns:
+            Dictionary with the same keys as StreamBenchmark.get_resource_usage.
+        """
+        # The command name may contain spaces, so split after its closing
+        # parenthesis; fields[0] is then field 3 (state) of proc(5)
+        fields = stat[stat.rindex(b")") + 2:].split()
+        result = {}
+        
+        if "cpu_percent" in attrs:
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+            prev_ticks, prev_now = self.cpu_sample
+            self.cpu_sample = (ticks, now)
+            
+            elapsed = (now - prev_now) / 1e9
+            result['cpu_percent'] = (
+                (ticks - prev_ticks) / _CLOCK_TICKS / elapsed * 100 if elapsed > 0 else 0.0
+            )
+            
+        if "memory_info" in attrs:
+            result['memory_rss_mb'] = int(fields[21]) * _PAGE_SIZE / (1024 * 1024)
+            result['memory_vms_mb'] = int(fields[20]) / (1024 * 1024)
+        
+        counters = {}
+        for line in io.splitlines():
+            name, _, value = line.partition(b": ")
+            counters[name] = value
+        if b"read_bytes" in counters and b"write_bytes" in counters:
+            result.update({
+                'io_read_mb': int(counters[b"read_bytes"]) / (1024 * 1024),
+                'io_write_mb': int(counters[b"write_bytes"]) / (1024 * 1024),
+            })
+            
+        return result
+    
+    def close(self):
+        """Close the file descriptors."""
+        os.close(self.stat_fd)
+        if self.io_fd is not None:
+            os.close(self.io_fd)
+
+def _cpu_ids(cpus: Sequence[int]) -> Tuple[int, ...]:
+    """Return the CPU IDs as a tuple, raising ValueError unless all are non-negative ints."""
+    cpus = tuple(cpus)
+    for cpu in cpus:
+        if isinstance(cpu, bool) or not isinstance(cpu, int) or cpu < 0:
+            raise ValueError(f"Invalid CPU ID: {cpu!r}")
+    return cpus
+
+def _sum_usage(usages: List[Dict[str, float]]) -> Dict[str, float]:
+    """Add up the resource usage of several processes, skipping empty samples."""
+    total: Dict[str, float] = {}
+    for usage in usages:
+        for key, value in usage.items():
+            total[key] = total.get(key, 0.0) + value
+    return total
+
 class StreamOperation(enum.Enum):
     """STREAM benchmark operation types."""
     COPY = "copy"
@@ -36,6 +173,21 @@ class StreamBenchmark:
     the behavior of other code under memory contention.
     """
     
+    # NUMA probe results keyed by (executable path, mtime in ns), shared by
+    # all instances so the probe runs once per build of the executable
+    _numa_support_cache: Dict[Tuple[str, int], bool] = {}
+    
+    # Attributes that build_command() depends on; assigning any of them
+    # invalidates the cached command line
+    _COMMAND_ATTRS = frozenset({
+        "executable", "threads", "array_size", "operation", "scalar",
+        "runtime_seconds", "use_hrperf", "silent_mode", "cpus", "numa_nodes",
+        "replicas", "cpu_groups", "numa_alloc_mode", "_numa_support",
+    })
+    
+    # Supported array placement policies, see set_numa_alloc_mode()
+    NUMA_ALLOC_MODES = ("default", "onnode")
+    
     def __init__(self, 
                  executable_path: Optional[str] = None,
                  threads: int = 4,
@@ -43,7 +195,10 @@ class StreamBenchmark:
                  operation: StreamOperation = StreamOperation.TRIAD,
                  scalar: float = 3.0,
                  cpus: Optional[Sequence[int]] = None,
-                 numa_nodes: Optional[Sequence[int]] = None):
+                 numa_nodes: Optional[Sequence[int]] = None,
+                 replicas: int = 1,
+                 cpu_groups: Optional[Sequence[Sequence[int]]] = None,
+                 numa_alloc_mode: str = "default"):
         """
         Initialize the STREAM benchmark wrapper.
         
@@ -58,19 +213,35 @@ class StreamBenchmark:
                   If None, no CPU affinity is set.
             numa_nodes: List of NUMA node IDs to use for memory allocation.
                         If None, no NUMA binding is used.
+            replicas: Number of STREAM processes to run side by side, all
+                      watched by a single monitor thread.
+            cpu_groups: One list of CPU IDs per replica, overriding cpus. If
+                        given, replicas defaults to the number of groups.
+            numa_alloc_mode: How the arrays are placed in memory, one of
+                             NUMA_ALLOC_MODES. See set_numa_alloc_mode().
         """
-        self.process = None
+        if cpu_groups is not None and replicas not in (1, len(cpu_groups)):
+            raise ValueError(f"Got {replicas} replicas but {len(cpu_groups)} CPU groups")
+        if replicas < 1:
+            raise ValueError("Number of replicas must be at least 1")
+        if numa_alloc_mode not in self.NUMA_ALLOC_MODES:
+            raise ValueError(f"Unknown NUMA allocation mode: {numa_alloc_mode}")
+            
+        self._cmd_dirty = True
+        self._cached_cmds: Optional[List[List[str]]] = None
+        
+        self.processes: List[subprocess.Popen] = []
         self.stop_event = threading.Event()
         self.monitor_thread = None
+        self._exited = threading.Event()  # Set by the monitor thread once all replicas exited
+        
+        # Persistent /proc file descriptors per running process (Linux only)
+        self._proc_stats: List[_ProcStats] = []
+        self._psutil_procs: List[psutil.Process] = []  # Used instead where procfs is unavailable
         
         # Find the executable
         if executable_path is None:
-            package_dir = os.path.dirname(os.path.abspath(__file__))
-            self.executable = os.path.join(package_dir, "c_src", "stream")
-            
-            # If not found in the installed package, try to build it
-            if not os.path.isfile(self.executable):
-                self._build_executable()
+            self.executable = self._locate_binary()
         else:
             self.executable = executable_path
             
@@ -90,11 +261,15 @@ class StreamBenchmark:
         self.silent_mode = True      # Default to silent mode for background use
         
         # CPU and NUMA configuration
-        self.cpus = list(cpus) if cpus is not None else None
-        self.numa_nodes = list(numa_nodes) if numa_nodes is not None else None
+        self.cpus = cpus
+        self.numa_nodes = numa_nodes
+        self.replicas = replicas
+        self._requested_replicas = replicas  # Restored when cpu_groups is cleared
+        self.cpu_groups = cpu_groups
+        self.numa_alloc_mode = numa_alloc_mode
         
-        # Check if NUMA support is available 
-        self.numa_support = self._check_numa_support()
+        # Probed lazily by the numa_support property, only needed with NUMA nodes
+        self._numa_support = None
         if self.numa_nodes and not self.numa_support:
             logger.warning("NUMA nodes specified but NUMA support is not available in the executable. "
                           "NUMA-specific options will be ignored.")
@@ -102,23 +277,143 @@ class StreamBenchmark:
         # Register cleanup handler
         atexit.register(self.stop)
     
+    def __setattr__(self, name, value):
+        if name in self._COMMAND_ATTRS:
+            object.__setattr__(self, "_cmd_dirty", True)
+        object.__setattr__(self, name, value)
+    
+    # The CPU and NUMA lists below are stored as tuples: build_command() is
+    # cached and only invalidated on assignment, so they must not be
+    # modified in place
+    
+    @property
+    def cpus(self) -> Optional[Tuple[int, ...]]:
+        """CPU IDs to pin the benchmark threads to, or None for no affinity."""
+        return self._cpus
+    
+    @cpus.setter
+    def cpus(self, cpus: Optional[Sequence[int]]):
+        self._cpus = _cpu_ids(cpus) if cpus is not None else None
+        # Formatted once here instead of on every build_command()
+        self._cpus_str = ",".join(map(str, self._cpus)) if self._cpus else None
+    
+    @property
+    def cpu_groups(self) -> Optional[Tuple[Tuple[int, ...], ...]]:
+        """Per-replica CPU IDs, or None to use cpus for every replica."""
+        return self._cpu_groups
+    
+    @cpu_groups.setter
+    def cpu_groups(self, groups: Optional[Sequence[Sequence[int]]]):
+        had_groups = getattr(self, "_cpu_groups", None) is not None
+        self._cpu_groups = tuple(_cpu_ids(group) for group in groups) if groups else None
+        self._cpu_group_strs = [",".join(map(str, group)) for group in self._cpu_groups or []]
+        if self._cpu_groups:
+            self.replicas = len(self._cpu_groups)
+        elif had_groups:
+            # Don't keep one replica per group that no longer exists
+            self.replicas = self._requested_replicas
+    
+    @property
+    def process(self) -> Optional[subprocess.Popen]:
+        """The (first) STREAM process of the current run, or None."""
+        return self.processes[0] if self.processes else None
+    
+    @property
+    def numa_nodes(self) -> Optional[Tuple[int, ...]]:
+        """NUMA node IDs to allocate memory from, or None for no binding."""
+        return self._numa_nodes
+    
+    @numa_nodes.setter
+    def numa_nodes(self, nodes: Optional[Sequence[int]]):
+        self._numa_nodes = tuple(nodes) if nodes is not None else None
+        self._numa_nodes_str = ",".join(map(str, self._numa_nodes)) if self._numa_nodes else None
+    
+    @property
+    def numa_support(self) -> bool:
+        """Whether the executable was built with NUMA support, probed on first access."""
+        if self._numa_support is None:
+            self._numa_support = self._check_numa_support()
+        return self._numa_support
+    
     def _check_numa_support(self):
         """Check if the executable was built with NUMA support."""
         try:
-            # Run the executable with NUMA option to check if it's supported
+            key = (self.executable, os.stat(self.executable).st_mtime_ns)
+        except OSError:
+            return False
+        
+        cached = self._numa_support_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            # The help output reports whether NUMA support was compiled in,
+            # which avoids running an actual benchmark just to find out.
+            # Only a fixed substring is needed, so it's searched as bytes.
             result = subprocess.run(
-                [self.executable, "-m", "0", "-n", "1", "-s", "10", "-i", "1", "-q"],
-                stderr=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                text=True,
-                timeout=2
+                [self.executable, "-h"],
+                capture_output=True,
+                timeout=1
             )
-            # If we get an error message about NUMA support not compiled in, it's not available
-            return "NUMA support not compiled in" not in result.stderr
+            if b"NUMA support:" in result.stdout:
+                supported = b"NUMA support: enabled" in result.stdout
+            else:
+                # Executables without -h: run with the NUMA option to check if it's supported
+                result = subprocess.run(
+                    [self.executable, "-m", "0", "-n", "1", "-s", "10", "-i", "1", "-q"],
+                    stderr=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    timeout=2
+                )
+                # If we get an error message about NUMA support not compiled in, it's not available
+                supported = b"NUMA support not compiled in" not in result.stderr
         except (subprocess.SubprocessError, OSError):
+            # Don't cache failures, they may be transient (e.g. a timeout)
             return False
+        
+        self._numa_support_cache[key] = supported
+        return supported
     
-    def _build_executable(self):
+    @classmethod
+    def _locate_binary(cls) -> str:
+        """
+        Find the STREAM executable included with this package.
+        
+        If it's not found in the installed package, an attempt is made to
+        build it from the bundled sources.
+        
+        Returns:
+            Path of the executable, which may still be missing if the build failed.
+        """
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        executable = cls._select_variant(os.path.join(package_dir, "c_src", "stream"))
+        if not os.path.isfile(executable):
+            cls._build_executable()
+        return executable
+    
+    @staticmethod
+    def _select_variant(executable: str) -> str:
+        """
+        Pick the best SIMD variant of an executable the CPU supports.
+        
+        Args:
+            executable: Path of the baseline executable.
+            
+        Returns:
+            Path of the variant, or the baseline if none is built or usable.
+        """
+        # aarch64 always has NEON, so only x86-64 ships variants
+        if platform.machine().lower() not in ("x86_64", "amd64"):
+            return executable
+        flags = _cpu_flags()
+        for tag, required in _SIMD_VARIANTS:
+            variant = f"{executable}.{tag}"
+            if required <= flags and os.path.isfile(variant):
+                return variant
+        return executable
+    
+    @classmethod
+    def _build_executable(cls):
         """Attempt to build the STREAM executable if it's not found."""
         try:
             # Get the source directory
@@ -128,49 +423,28 @@ class StreamBenchmark:
                 logger.error(f"Source directory not found at {source_dir}")
                 return
                 
-            # Store current directory
-            cwd = os.getcwd()
+            # Check if source files exist
+            if not os.path.isfile(os.path.join(source_dir, "stream.c")):
+                logger.error("stream.c not found in source directory")
+                return
             
-            try:
-                # Change to source directory
-                os.chdir(source_dir)
-                
-                # Check if source files exist
-                if not os.path.isfile("stream.c"):
-                    logger.error("stream.c not found in source directory")
-                    return
-                
-                # Check if libnuma is available
-                numa_available = False
-                try:
-                    result = subprocess.run(
-                        ["ldconfig", "-p"], 
-                        capture_output=True, 
-                        text=True
-                    )
-                    if "libnuma.so" in result.stdout:
-                        numa_available = True
-                except:
-                    pass
-                
-                # Build command based on NUMA availability
-                if numa_available:
-                    logger.info("Building STREAM executable with NUMA support")
-                    build_cmd = ["make", "USE_NUMA=1"]
-                else:
-                    logger.info("Building STREAM executable without NUMA support")
-                    build_cmd = ["make"]
-                
-                # Attempt to build
-                logger.info("Attempting to build STREAM executable...")
-                subprocess.check_call(["make", "clean"])
-                subprocess.check_call(build_cmd)
-                
-                logger.info("STREAM executable built successfully")
-                
-            finally:
-                # Always return to original directory
-                os.chdir(cwd)
+            # Check if libnuma is available
+            numa_available = ctypes.util.find_library("numa") is not None
+            
+            # Build command based on NUMA availability
+            if numa_available:
+                logger.info("Building STREAM executable with NUMA support")
+                build_cmd = ["make", "USE_NUMA=1"]
+            else:
+                logger.info("Building STREAM executable without NUMA support")
+                build_cmd = ["make"]
+            
+            # Attempt to build
+            logger.info("Attempting to build STREAM executable...")
+            run_make(["make", "clean"], source_dir)
+            run_make(build_cmd, source_dir)
+            
+            logger.info("STREAM executable built successfully")
                 
         except Exception as e:
             logger.error(f"Failed to build STREAM executable: {e}")
@@ -182,7 +456,18 @@ class StreamBenchmark:
         Args:
             cpus: List of CPU IDs to use for thread affinity.
         """
-        self.cpus = list(cpus) if cpus is not None else None
+        self.cpus = cpus
+    
+    def set_cpu_groups(self, groups: Sequence[Sequence[int]]):
+        """
+        Run one replica per CPU group, each pinned to its own group.
+        
+        Args:
+            groups: One list of CPU IDs per replica. None or an empty list
+                    clears the groups and restores the replica count given
+                    to the constructor.
+        """
+        self.cpu_groups = groups
     
     def set_numa_nodes(self, nodes: Sequence[int]):
         """
@@ -191,13 +476,31 @@ class StreamBenchmark:
         Args:
             nodes: List of NUMA node IDs to use.
         """
-        self.numa_nodes = list(nodes) if nodes is not None else None
+        self.numa_nodes = nodes
         
         # Warn if NUMA support is not available
         if self.numa_nodes and not self.numa_support:
             logger.warning("NUMA nodes specified but NUMA support is not available. "
                          "NUMA-specific options will be ignored.")
             
+    def set_numa_alloc_mode(self, mode: str):
+        """
+        Set how the benchmark arrays are placed in memory.
+        
+        With "default" the arrays are allocated with malloc and initialized
+        by the main thread, so first touch puts every page on the main
+        thread's node. With "onnode" each worker thread initializes its own
+        chunk with its CPU and NUMA binding applied, so the pages land next
+        to the thread that uses them, and the arrays are allocated on the
+        first of the NUMA nodes if any are set.
+        
+        Args:
+            mode: One of NUMA_ALLOC_MODES.
+        """
+        if mode not in self.NUMA_ALLOC_MODES:
+            raise ValueError(f"Unknown NUMA allocation mode: {mode}")
+        self.numa_alloc_mode = mode
+    
     def set_runtime(self, seconds: float):
         """
         Set the benchmark to run for a specific duration.
@@ -225,13 +528,36 @@ class StreamBenchmark:
         """
         self.silent_mode = silent
     
-    def build_command(self) -> List[str]:
+    def build_command(self, replica: int = 0) -> List[str]:
         """
         Build the command to run the STREAM benchmark.
         
+        The commands are cached and only rebuilt after a configuration
+        attribute has been assigned, e.g. through one of the setters.
+        
+        Args:
+            replica: Index of the replica to build the command for. Replicas
+                     only differ in their CPU affinity.
+        
         Returns:
             List of command arguments.
         """
+        if self._cmd_dirty:
+            cmds = self._build_commands()
+            self._cached_cmds = cmds
+            self._cmd_dirty = False
+        # Return a copy so callers can't modify the cached command
+        return list(self._cached_cmds[replica])
+    
+    def _replica_cpus(self, replica: int) -> Tuple[Optional[Tuple[int, ...]], Optional[str]]:
+        """Return the CPU list of a replica and its formatted form."""
+        if self.cpu_groups:
+            index = replica % len(self.cpu_groups)
+            return self.cpu_groups[index], self._cpu_group_strs[index]
+        return self.cpus, self._cpus_str
+    
+    def _build_commands(self) -> List[List[str]]:
+        """Build the command line of every replica."""
         cmd = [
             self.executable,
             "-n", str(self.threads),
@@ -252,19 +578,24 @@ class StreamBenchmark:
         if self.silent_mode:
             cmd.append("-q")
             
-        # Add CPU affinity if specified
-        if self.cpus:
-            cpu_list = ",".join(map(str, self.cpus))
-            cmd.extend(["-a", cpu_list])
+        if self.numa_alloc_mode == "onnode":
+            cmd.append("-l")
             
         # Add NUMA nodes if specified and supported
+        numa_args = []
         if self.numa_nodes and self.numa_support:
-            numa_list = ",".join(map(str, self.numa_nodes))
-            cmd.extend(["-m", numa_list])
+            numa_args = ["-m", self._numa_nodes_str]
             
-        return cmd
+        cmds = []
+        for replica in range(self.replicas):
+            # Add CPU affinity if specified
+            cpus, cpus_str = self._replica_cpus(replica)
+            cpu_args = ["-a", cpus_str] if cpus else []
+            cmds.append(cmd + cpu_args + numa_args)
+        return cmds
     
-    def start(self, blocking: bool = False) -> Optional[subprocess.CompletedProcess]:
+    def start(self, blocking: bool = False) -> Union[subprocess.CompletedProcess,
+                                                     List[subprocess.CompletedProcess], None]:
         """
         Start the STREAM benchmark.
         
@@ -273,43 +604,77 @@ class StreamBenchmark:
                      If False (default), run in the background.
                      
         Returns:
-            If blocking, returns the CompletedProcess instance.
+            If blocking, returns the CompletedProcess instance, or a list with
+            one CompletedProcess per replica if there are several replicas.
             If non-blocking, returns None.
         """
-        if self.process is not None and self.process.poll() is None:
+        if self.is_running():
             logger.warning("STREAM benchmark is already running")
             return None
+        if self.processes:
+            # Release what is left of the previous, finished run
+            self.stop()
             
-        cmd = self.build_command()
-        logger.debug(f"Running STREAM benchmark: {' '.join(cmd)}")
+        cmds = [self.build_command(replica) for replica in range(self.replicas)]
+        for cmd in cmds:
+            logger.debug(f"Running STREAM benchmark: {' '.join(cmd)}")
+        
+        # With close_fds=False (and no preexec_fn, cwd or new session)
+        # subprocess launches the child with posix_spawn instead of fork+exec,
+        # which avoids copying the page tables of a large parent process.
+        # File descriptors created by Python are non-inheritable anyway.
         
         try:
             if blocking:
                 # Run in blocking mode and return results
-                result = subprocess.run(
-                    cmd, 
-                    stdout=None if not self.silent_mode else subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                return result
+                children = []
+                try:
+                    for replica, cmd in enumerate(cmds):
+                        with self._spawn_affinity(self._replica_cpus(replica)[0]):
+                            children.append(subprocess.Popen(
+                                cmd, 
+                                stdout=None if not self.silent_mode else subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                text=True,
+                                close_fds=False
+                            ))
+                    results = []
+                    for cmd, child in zip(cmds, children):
+                        stdout, stderr = child.communicate()
+                        results.append(subprocess.CompletedProcess(cmd, child.returncode, stdout, stderr))
+                except BaseException:
+                    # Like subprocess.run, don't leave children behind
+                    for child in children:
+                        child.kill()
+                        child.wait()
+                    raise
+                return results[0] if len(results) == 1 else results
             else:
                 # Run in non-blocking mode
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=None if not self.silent_mode else subprocess.DEVNULL,
-                    stderr=subprocess.PIPE
-                )
+                for replica, cmd in enumerate(cmds):
+                    with self._spawn_affinity(self._replica_cpus(replica)[0]):
+                        self.processes.append(subprocess.Popen(
+                            cmd,
+                            stdout=None if not self.silent_mode else subprocess.DEVNULL,
+                            stderr=subprocess.PIPE,
+                            close_fds=False
+                        ))
+                self._open_proc_stats()
                 
-                # Start a monitor thread
+                # Start a single monitor thread for all replicas
                 self.stop_event.clear()
+                self._exited = threading.Event()
                 self.monitor_thread = threading.Thread(
                     target=self._monitor_process,
+                    args=(self._exited,),
                     daemon=True
                 )
                 self.monitor_thread.start()
                 return None
         except Exception as e:
+            # Don't leave a partially started set of replicas running
+            self.stop()
+            
             # Check for NUMA-related errors
             if self.numa_nodes and "NUMA not available" in str(e):
                 logger.error("NUMA support not available. Make sure libnuma is installed and the executable was built with NUMA support.")
@@ -321,59 +686,146 @@ class StreamBenchmark:
                 logger.error(f"Failed to start STREAM benchmark: {e}")
             raise
     
+    @contextlib.contextmanager
+    def _spawn_affinity(self, cpus: Optional[Sequence[int]]):
+        """
+        Temporarily restrict the calling thread to the given CPUs.
+        
+        A child inherits the CPU mask of the thread that spawns it, so the
+        whole STREAM process, including the main thread that allocates and
+        initializes the arrays, starts confined to those CPUs. Unlike a
+        preexec_fn this keeps subprocess on its posix_spawn path.
+        
+        Args:
+            cpus: CPU IDs for the child, or None to leave the mask alone.
+        """
+        previous = None
+        if cpus and hasattr(os, "sched_setaffinity"):
+            try:
+                # pid 0 is the calling thread, other threads are unaffected
+                previous = os.sched_getaffinity(0)
+                os.sched_setaffinity(0, cpus)
+            except (OSError, ValueError, OverflowError) as e:
+                # e.g. a CPU ID beyond what the kernel's mask can hold
+                logger.warning(f"Failed to set CPU affinity to {cpus}: {e}")
+                previous = None
+        try:
+            yield
+        finally:
+            if previous is not None:
+                os.sched_setaffinity(0, previous)
+    
     def stop(self):
         """Stop the STREAM benchmark if it's running."""
-        if self.process is not None and self.process.poll() is None:
+        running = [process for process in self.processes if process.poll() is None]
+        if running:
             logger.debug("Stopping STREAM benchmark")
             # Signal the monitor thread to stop
             self.stop_event.set()
             
-            # Try to terminate the process gracefully first
-            self.process.terminate()
+            # Try to terminate the processes gracefully first
+            for process in running:
+                process.terminate()
             
-            # Give it a moment to clean up
-            try:
-                self.process.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                # Force kill if it doesn't terminate
-                logger.warning("STREAM benchmark did not terminate gracefully, forcing kill")
-                self.process.kill()
+            # Give them a moment to clean up
+            deadline = time.monotonic() + 2
+            for process in running:
+                try:
+                    process.wait(timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    # Force kill if it doesn't terminate
+                    logger.warning("STREAM benchmark did not terminate gracefully, forcing kill")
+                    process.kill()
+                    process.wait()
             
-            # Wait for monitor thread to finish
-            if self.monitor_thread and self.monitor_thread.is_alive():
-                self.monitor_thread.join(timeout=1)
+        # Wait for monitor thread to finish
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=1)
+            
+        # Release the stderr pipes now instead of whenever Popen is collected
+        for process in self.processes:
+            if process.stderr:
+                process.stderr.close()
+        self.processes = []
+        self._close_proc_stats()
     
     def is_running(self) -> bool:
         """
         Check if the STREAM benchmark is currently running.
         
         Returns:
-            True if running, False otherwise.
+            True if any replica is running, False otherwise.
         """
-        return self.process is not None and self.process.poll() is None
+        return any(process.poll() is None for process in self.processes)
     
-    def get_resource_usage(self) -> Dict[str, float]:
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the benchmark to finish.
+        
+        Args:
+            timeout: Maximum time to wait in seconds. If None, wait indefinitely.
+            
+        Returns:
+            True if no replica is running anymore, False if the timeout expired.
+        """
+        if not self.processes:
+            return True
+        # Popen.wait(timeout) polls waitpid every few milliseconds, which
+        # would perturb the benchmark; the monitor thread already blocks on
+        # the processes' exit and signals it through this event
+        return self._exited.wait(timeout)
+    
+    def get_resource_usage(self, attrs: Sequence[str] = _USAGE_ATTRS) -> Dict[str, float]:
         """
         Get resource usage statistics for the running benchmark.
         
+        With several replicas the values are summed over all of them.
+        
+        Args:
+            attrs: Which psutil style attributes to sample, a subset of
+                   ("cpu_percent", "memory_info", "io_counters"). Leaving
+                   out the ones you don't need saves reading their sources.
+        
         Returns:
             Dictionary with resource usage information or empty dict if not running.
         """
+        self._check_usage_attrs(attrs)
         if not self.is_running():
             return {}
-            
+        if self._proc_stats:
+            io = "io_counters" in attrs
+            samples = [stats.read(io) for stats in self._proc_stats]
+            return _sum_usage([
+                stats.parse(*sample, attrs)
+                for stats, sample in zip(self._proc_stats, samples) if sample is not None
+            ])
+        return _sum_usage([self._psutil_usage(proc, attrs) for proc in self._psutil_procs])
+    
+    @staticmethod
+    def _check_usage_attrs(attrs: Sequence[str]):
+        """Raise ValueError for attributes get_resource_usage doesn't know."""
+        unknown = set(attrs) - set(_USAGE_ATTRS)
+        if unknown:
+            raise ValueError(f"Unknown resource usage attributes: {', '.join(sorted(unknown))}")
+    
+    @staticmethod
+    def _psutil_usage(proc: psutil.Process, attrs: Sequence[str] = _USAGE_ATTRS) -> Dict[str, float]:
+        """Get the resource usage of one process through psutil."""
         try:
-            proc = psutil.Process(self.process.pid)
-            with proc.oneshot():
-                cpu_percent = proc.cpu_percent()
-                mem_info = proc.memory_info()
-                io_counters = proc.io_counters() if hasattr(proc, 'io_counters') else None
-                
-            result = {
-                'cpu_percent': cpu_percent,
-                'memory_rss_mb': mem_info.rss / (1024 * 1024),
-                'memory_vms_mb': mem_info.vms / (1024 * 1024),
-            }
+            # io_counters is missing on some platforms, e.g. macOS
+            info = proc.as_dict(attrs=[attr for attr in attrs if hasattr(proc, attr)])
+            cpu_percent = info.get('cpu_percent')
+            mem_info = info.get('memory_info')
+            io_counters = info.get('io_counters')
+            
+            result = {}
+            if cpu_percent is not None:
+                result['cpu_percent'] = cpu_percent
+            if mem_info is not None:
+                result.update({
+                    'memory_rss_mb': mem_info.rss / (1024 * 1024),
+                    'memory_vms_mb': mem_info.vms / (1024 * 1024),
+                })
             
             if io_counters:
                 result.update({
@@ -385,23 +837,193 @@ class StreamBenchmark:
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             return {}
     
-    def _monitor_process(self):
-        """Background thread to monitor the STREAM process."""
-        while not self.stop_event.is_set():
-            # Check if process has finished
-            if self.process.poll() is not None:
-                returncode = self.process.returncode
-                stderr = self.process.stderr.read() if self.process.stderr else None
+    def _open_proc_stats(self):
+        """Open the /proc files of the running processes, kept open until stop()."""
+        self._close_proc_stats()
+        try:
+            for process in self.processes:
+                self._proc_stats.append(_ProcStats(process.pid))
+            return
+        except OSError:
+            # No procfs (non-Linux), get_resource_usage falls back to psutil
+            self._close_proc_stats()
+            
+        for process in self.processes:
+            try:
+                proc = psutil.Process(process.pid)
+                # Prime cpu_percent so the first sample measures since start
+                proc.cpu_percent()
+                self._psutil_procs.append(proc)
+            except psutil.Error:
+                pass
+    
+    def _close_proc_stats(self):
+        """Close the /proc file descriptors opened by _open_proc_stats()."""
+        for stats in self._proc_stats:
+            stats.close()
+        self._proc_stats = []
+        self._psutil_procs = []
+    
+    @classmethod
+    def get_resource_usage_batch(cls, instances: Sequence["StreamBenchmark"],
+                                 attrs: Sequence[str] = _USAGE_ATTRS) -> List[Dict[str, float]]:
+        """
+        Get resource usage statistics for several running benchmarks at once.
+        
+        The /proc files of all instances are read in one tight pass before
+        any parsing happens, so the samples are taken at nearly the same
+        instant and are comparable across instances.
+        
+        Args:
+            instances: The benchmarks to sample.
+            attrs: Which attributes to sample, see get_resource_usage().
+            
+        Returns:
+            List with one get_resource_usage() style dictionary per instance,
+            in the same order.
+        """
+        cls._check_usage_attrs(attrs)
+        io = "io_counters" in attrs
+        raw = [
+            [stats.read(io) for stats in instance._proc_stats]
+            if instance._proc_stats and instance.is_running() else None
+            for instance in instances
+        ]
+        
+        results = []
+        for instance, samples in zip(instances, raw):
+            if samples is not None:
+                results.append(_sum_usage([
+                    stats.parse(*sample, attrs)
+                    for stats, sample in zip(instance._proc_stats, samples) if sample is not None
+                ]))
+            else:
+                # Not running, or no procfs and psutil is needed
+                results.append(instance.get_resource_usage(attrs))
+        return results
+    
+    @staticmethod
+    def _drain_fd(fd: int, chunks: List[bytes]) -> bool:
+        """
+        Read everything currently available from a non-blocking file descriptor.
+        
+        Args:
+            fd: The file descriptor to read from.
+            chunks: List the data read is appended to.
+            
+        Returns:
+            False once the descriptor has reached EOF, True otherwise.
+        """
+        while True:
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                return True
+            if not data:
+                return False
+            chunks.append(data)
+    
+    def _wait_pidfds(self, processes: List[subprocess.Popen]) -> Optional[List[bytes]]:
+        """
+        Block until all STREAM processes exit using pidfds.
+        
+        The pidfds and stderr pipes of all processes share one epoll instance,
+        so the thread only wakes up when a process exits or writes to stderr.
+        Stderr is drained without blocking, which means a grandchild holding a
+        pipe open cannot hang the monitor. The wait timeout only exists so
+        that stop_event is still observed.
+        
+        Args:
+            processes: The STREAM processes to wait for.
+            
+        Returns:
+            The bytes read from each process's stderr, or None if pidfds are
+            not available (Python < 3.9 or kernel < 5.3).
+        """
+        if not hasattr(os, "pidfd_open") or not hasattr(select, "epoll"):
+            return None
+        pidfds: Dict[int, int] = {}
+        try:
+            for index, process in enumerate(processes):
+                pidfds[os.pidfd_open(process.pid)] = index
+        except OSError:
+            # ENOSYS on old kernels, EPERM under some seccomp profiles, or
+            # ESRCH if a process is already gone; polling handles all three
+            for pidfd in pidfds:
+                os.close(pidfd)
+            return None
+        
+        stderr_fds = {
+            process.stderr.fileno(): index
+            for index, process in enumerate(processes) if process.stderr
+        }
+        chunks: List[List[bytes]] = [[] for _ in processes]
+        try:
+            with select.epoll() as ep:
+                for pidfd in pidfds:
+                    ep.register(pidfd, select.EPOLLIN)
+                for fd in stderr_fds:
+                    os.set_blocking(fd, False)
+                    ep.register(fd, select.EPOLLIN)
+                    
+                remaining = len(pidfds)
+                while remaining and not self.stop_event.is_set():
+                    for fd, _ in ep.poll(0.5):
+                        if fd in pidfds:
+                            # Stays readable once the process has exited
+                            ep.unregister(fd)
+                            remaining -= 1
+                        elif not self._drain_fd(fd, chunks[stderr_fds[fd]]):
+                            ep.unregister(fd)
+                            del stderr_fds[fd]
+                            
+                # Pick up anything written between the last wakeup and exit
+                for fd, index in stderr_fds.items():
+                    self._drain_fd(fd, chunks[index])
+        finally:
+            for pidfd in pidfds:
+                os.close(pidfd)
+        return [b"".join(process_chunks) for process_chunks in chunks]
+    
+    def _monitor_process(self, exited: threading.Event):
+        """Background thread monitoring the STREAM processes."""
+        try:
+            # stop() drops self.processes once this thread is done, keep a reference
+            processes = list(self.processes)
+            stderrs = self._wait_pidfds(processes)
+            if stderrs is None:
+                # No pidfd support, fall back to polling the processes. The bound
+                # methods are looked up once since this loop runs for the whole
+                # lifetime of the benchmark
+                polls = [process.poll for process in processes]
+                wait = self.stop_event.wait
+                while any(poll() is None for poll in polls):
+                    # Unlike time.sleep this returns as soon as stop() sets the event
+                    if wait(0.1):
+                        break
+                if not self.stop_event.is_set():
+                    stderrs = [process.stderr.read() if process.stderr else None for process in processes]
+            
+            # The benchmark is being stopped on purpose, nothing to report
+            if self.stop_event.is_set():
+                return
+            
+            for index, (process, stderr) in enumerate(zip(processes, stderrs)):
+                # Reap the process; Popen owns the wait so its returncode stays valid.
+                # It has already exited, but poll() would return None while another
+                # thread (e.g. in is_running()) holds Popen's wait lock, so block.
+                returncode = process.wait()
+                if process.stderr:
+                    process.stderr.close()
+                stderr = stderr.decode(errors="replace").strip() if stderr else None
+                name = "STREAM benchmark" if len(processes) == 1 else f"STREAM benchmark replica {index}"
                 
                 if returncode != 0 and stderr:
-                    logger.error(f"STREAM benchmark failed with code {returncode}: {stderr}")
+                    logger.error(f"{name} failed with code {returncode}: {stderr}")
                 elif returncode != 0:
-                    logger.error(f"STREAM benchmark failed with code {returncode}")
+                    logger.error(f"{name} failed with code {returncode}")
                 else:
-                    logger.debug("STREAM benchmark completed successfully")
-                    
-                # Process has finished, exit the monitoring loop
-                break
-                
-            # Sleep before checking again
-            time.sleep(0.1)
+                    logger.debug(f"{name} completed successfully")
+        finally:
+            # Wakes up wait(), only after any failure has been logged
+            exited.set()
@@ -24,6 +24,25 @@
 #define STREAM_TYPE double
 #endif
 
+/* Compile-time defaults for -s and -i, and the padding between the arrays.
+ * The Python wrapper always passes -s and -i, so the defaults only matter
+ * when the executable is run directly. */
+#ifndef STREAM_ARRAY_SIZE
+#define STREAM_ARRAY_SIZE 10000000
+#endif
+
+#ifndef NTIMES
+#define NTIMES 10
+#endif
+
+#ifndef OFFSET
+#define OFFSET 0
+#endif
+
+#if OFFSET < 0
+#error "OFFSET must not be negative, the arrays would overlap"
+#endif
+
 #define MAX_CPUS 1024
 #define MAX_NUMA_NODES 64
 #define MAX_CPU_STR_LEN 4096
@@ -67,6 +86,46 @@ __attribute__((noinline)) void array_triad(ssize_t start, ssize_t end, STREAM_TY
 void validate(ssize_t start, ssize_t end, operation_t operation, STREAM_TYPE scalar);
 
 void *thread_function(void *arg);
+void *init_function(void *arg);
+void bind_thread(thread_data_t *data);
+
+/* Print usage, including whether this build has NUMA support */
+void print_usage(FILE *out, const char *prog) {
+    fprintf(out, "Usage: %s -n num_threads -s array_size -i num_iterations -o operation -c scalar [-p] [-q] [-r runtime_seconds] [-a cpu_list] [-m numa_nodes] [-l]\n", prog);
+    fprintf(out, "  -p: Use hrperf for performance measurement\n");
+    fprintf(out, "  -q: Silent mode (no output)\n");
+    fprintf(out, "  -r: Run for specified number of seconds instead of fixed iterations\n");
+    fprintf(out, "  -a: Specify CPU affinity as comma-separated list (e.g., 0,2,4,6)\n");
+    fprintf(out, "  -m: Specify NUMA nodes as comma-separated list (e.g., 0,1)\n");
+    fprintf(out, "  -l: Allocate arrays on the first NUMA node and initialize them from the worker threads\n");
+    fprintf(out, "  -h: Show this help and exit\n");
+#ifdef USE_NUMA
+    fprintf(out, "NUMA support: enabled\n");
+#else
+    fprintf(out, "NUMA support: disabled\n");
+#endif
+}
+
+/* Allocate an array, on the given NUMA node if node >= 0 */
+STREAM_TYPE *alloc_array(ssize_t array_size, int node) {
+#ifdef USE_NUMA
+    if (node >= 0) {
+        return (STREAM_TYPE *) numa_alloc_onnode(sizeof(STREAM_TYPE) * array_size, node);
+    }
+#endif
+    return (STREAM_TYPE *) malloc(sizeof(STREAM_TYPE) * array_size);
+}
+
+/* Free an array allocated by alloc_array with the same arguments */
+void free_array(STREAM_TYPE *array, ssize_t array_size, int node) {
+#ifdef USE_NUMA
+    if (node >= 0) {
+        numa_free(array, sizeof(STREAM_TYPE) * array_size);
+        return;
+    }
+#endif
+    free(array);
+}
 
 /* Parse comma-separated list of integers */
 int parse_int_list(const char *str, int *result, int max_values) {
@@ -101,8 +160,8 @@ int parse_int_list(const char *str, int *result, int max_values) {
 
 int main(int argc, char *argv[]) {
     int num_threads = 1;
-    ssize_t array_size = 10000000;
-    int num_iterations = 10;
+    ssize_t array_size = STREAM_ARRAY_SIZE;
+    int num_iterations = NTIMES;
     operation_t operation = OP_COPY;
     STREAM_TYPE scalar = 3.0;
     int use_hrperf = 0;    /* Flag for hrperf toggle */
@@ -119,9 +178,10 @@ int main(int argc, char *argv[]) {
     int numa_nodes[MAX_NUMA_NODES];
     int num_numa_nodes = 0;
     int use_numa = 0;
+    int local_alloc = 0;   /* Flag for node-local allocation and parallel first touch */
 
     int opt;
-    while ((opt = getopt(argc, argv, "n:s:i:o:c:pqr:a:m:")) != -1) {
+    while ((opt = getopt(argc, argv, "n:s:i:o:c:pqr:a:m:lh")) != -1) {
         switch (opt) {
             case 'n':
                 num_threads = atoi(optarg);
@@ -200,13 +260,14 @@ int main(int argc, char *argv[]) {
                 exit(EXIT_FAILURE);
 #endif
                 break;
+            case 'l':       /* Option for node-local allocation */
+                local_alloc = 1;
+                break;
+            case 'h':       /* Help, also used to probe build features */
+                print_usage(stdout, argv[0]);
+                exit(EXIT_SUCCESS);
             default:
-                fprintf(stderr, "Usage: %s -n num_threads -s array_size -i num_iterations -o operation -c scalar [-p] [-q] [-r runtime_seconds] [-a cpu_list] [-m numa_nodes]\n", argv[0]);
-                fprintf(stderr, "  -p: Use hrperf for performance measurement\n");
-                fprintf(stderr, "  -q: Silent mode (no output)\n");
-                fprintf(stderr, "  -r: Run for specified number of seconds instead of fixed iterations\n");
-                fprintf(stderr, "  -a: Specify CPU affinity as comma-separated list (e.g., 0,2,4,6)\n");
-                fprintf(stderr, "  -m: Specify NUMA nodes as comma-separated list (e.g., 0,1)\n");
+                print_usage(stderr, argv[0]);
                 exit(EXIT_FAILURE);
         }
     }
@@ -242,23 +303,21 @@ int main(int argc, char *argv[]) {
     }
 #endif
 
-    // Allocate arrays
-    a = (STREAM_TYPE *) malloc(sizeof(STREAM_TYPE) * array_size);
-    b = (STREAM_TYPE *) malloc(sizeof(STREAM_TYPE) * array_size);
-    c = (STREAM_TYPE *) malloc(sizeof(STREAM_TYPE) * array_size);
+    // Allocate arrays, on the first NUMA node if local allocation is requested
+    int alloc_node = (local_alloc && use_numa) ? numa_nodes[0] : -1;
+    // Lay the arrays out back to back in one block, each padded by OFFSET
+    // elements, like the static a[N+OFFSET], b[N+OFFSET], c[N+OFFSET] of
+    // the original STREAM, so OFFSET changes their relative alignment
+    ssize_t stride = array_size + OFFSET;
+    a = alloc_array(3 * stride, alloc_node);
 
-    if (a == NULL || b == NULL || c == NULL) {
+    if (a == NULL) {
         fprintf(stderr, "Failed to allocate arrays\n");
         exit(EXIT_FAILURE);
     }
 
-    // Initialize arrays
-    ssize_t j;
-    for (j = 0; j < array_size; j++) {
-        a[j] = 1.0;
-        b[j] = 2.0;
-        c[j] = 0.0;
-    }
+    b = a + stride;
+    c = b + stride;
 
     // Allocate thread completion times array
     thread_completion_times = (double *) malloc(sizeof(double) * num_threads);
@@ -300,13 +359,6 @@ int main(int argc, char *argv[]) {
     // Create counter for total iterations (used in runtime mode)
     int total_iterations_completed = 0;
 
-    /* Start hrperf only if enabled */
-    if (use_hrperf) {
-        hrperf_start();
-    }
-
-    gettimeofday(&start_time, NULL);
-
     int i;
     for (i = 0; i < num_threads; i++) {
         thread_data[i].thread_id = i;
@@ -344,7 +396,40 @@ int main(int argc, char *argv[]) {
         } else {
             thread_data[i].num_numa_nodes = 0;
         }
-        
+    }
+
+    // Initialize arrays
+    if (local_alloc) {
+        // Let every thread touch its own chunk first, with the same CPU and
+        // NUMA binding as the worker that later runs on it, so the pages are
+        // placed on the worker's local node
+        for (i = 0; i < num_threads; i++) {
+            int rc = pthread_create(&threads[i], NULL, init_function, (void *)&thread_data[i]);
+            if (rc) {
+                fprintf(stderr, "Error creating init thread %d\n", i);
+                exit(EXIT_FAILURE);
+            }
+        }
+        for (i = 0; i < num_threads; i++) {
+            pthread_join(threads[i], NULL);
+        }
+    } else {
+        ssize_t j;
+        for (j = 0; j < array_size; j++) {
+            a[j] = 1.0;
+            b[j] = 2.0;
+            c[j] = 0.0;
+        }
+    }
+
+    /* Start hrperf only if enabled */
+    if (use_hrperf) {
+        hrperf_start();
+    }
+
+    gettimeofday(&start_time, NULL);
+
+    for (i = 0; i < num_threads; i++) {
         int rc = pthread_create(&threads[i], NULL, thread_function, (void *)&thread_data[i]);
         if (rc) {
             fprintf(stderr, "Error creating thread %d\n", i);
@@ -438,9 +523,7 @@ int main(int argc, char *argv[]) {
     }
 
     // Clean up
-    free(a);
-    free(b);
-    free(c);
+    free_array(a, 3 * stride, alloc_node);
     free(threads);
     free(thread_data);
     free(thread_completion_times);
@@ -523,13 +606,8 @@ void validate(ssize_t start, ssize_t end, operation_t operation, STREAM_TYPE sca
     }
 }
 
-void *thread_function(void *arg) {
-    extern struct timeval start_time;
-    extern double *thread_completion_times;
-    struct timeval current_time;
-    thread_data_t *data = (thread_data_t *)arg;
-    int i = 0;
-    
+/* Apply the CPU affinity and NUMA policy of a thread to the calling thread */
+void bind_thread(thread_data_t *data) {
     // Set CPU affinity if requested
 #if defined(__linux__)
     if (data->use_cpuset) {
@@ -554,6 +632,32 @@ void *thread_function(void *arg) {
         numa_free_nodemask(node_mask);
     }
 #endif
+}
+
+/* Initialize this thread's chunk of the arrays (first touch) */
+void *init_function(void *arg) {
+    thread_data_t *data = (thread_data_t *)arg;
+    ssize_t j;
+
+    bind_thread(data);
+
+    for (j = data->start_index; j < data->end_index; j++) {
+        a[j] = 1.0;
+        b[j] = 2.0;
+        c[j] = 0.0;
+    }
+
+    return(NULL);
+}
+
+void *thread_function(void *arg) {
+    extern struct timeval start_time;
+    extern double *thread_completion_times;
+    struct timeval current_time;
+    thread_data_t *data = (thread_data_t *)arg;
+    int i = 0;
+    
+    bind_thread(data);
     
     if (data->runtime_mode) {
         // Runtime mode: Run until time is up
@@ -1,10 +1,92 @@
-from setuptools import setup, find_packages, Extension
+from setuptools import setup, Distribution
 from setuptools.command.build_py import build_py
-import subprocess
 import os
 import sys
 import platform
 import shutil
+import functools
+import hashlib
+import glob
+import importlib.util
+from ctypes.util import find_library
+
+try:
+    from setuptools.command.bdist_wheel import bdist_wheel
+except ImportError:
+    try:
+        from wheel.bdist_wheel import bdist_wheel
+    except ImportError:
+        bdist_wheel = None
+
+def _load_build_helpers():
+    """Load pystream/_build.py without importing pystream, whose dependencies may be missing."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pystream', '_build.py')
+    spec = importlib.util.spec_from_file_location('_pystream_build', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Shared with StreamBenchmark so both report make failures the same way
+run_make = _load_build_helpers().run_make
+
+@functools.lru_cache(maxsize=None)
+def _numa_available():
+    """Check if libnuma is available on the system, once per setup.py run."""
+    # Uses the dynamic linker cache, no need to scan library directories
+    if find_library('numa'):
+        return True
+        
+    # Check for the header file
+    for header in ('/usr/include/numa.h', '/usr/local/include/numa.h', '/opt/homebrew/include/numa.h'):
+        if os.path.exists(header):
+            return True
+            
+    return False
+
+# SIMD variants built next to the baseline executable on x86-64 as
+# stream.<tag>. StreamBenchmark picks the best one the CPU supports.
+SIMD_VARIANTS = [
+    ('avx2', '-mavx2 -mfma'),
+    ('avx512', '-mavx512f -mavx512dq'),
+]
+
+# Environment variables baked into the executable as -D defines, with the
+# smallest value each accepts. OFFSET pads the arrays, which stream.c lays
+# out back to back, so a negative one would make them overlap.
+STREAM_DEFINES = [
+    ('PYSTREAM_ARRAY_SIZE', 'STREAM_ARRAY_SIZE', 1),
+    ('PYSTREAM_NTIMES', 'NTIMES', 1),
+    ('PYSTREAM_OFFSET', 'OFFSET', 0),
+]
+
+def _stream_defines():
+    """Return the -D flags for the STREAM_DEFINES set in the environment."""
+    defines = []
+    for env, name, minimum in STREAM_DEFINES:
+        value = os.environ.get(env)
+        if not value:
+            continue
+        try:
+            number = int(value)
+        except ValueError:
+            number = None
+        if number is None or number < minimum:
+            raise ValueError(f"{env} must be an integer of at least {minimum}, got {value!r}")
+        defines.append(f'-D{name}={number}')
+    return defines
+
+def _build_cache_key(c_src_dir, build_cmd):
+    """Hash the C sources, Makefile and make arguments that produce the executable."""
+    inputs = sorted(glob.glob(os.path.join(c_src_dir, '*.[ch]')))
+    inputs.append(os.path.join(c_src_dir, 'Makefile'))
+    digest = hashlib.sha256()
+    for path in inputs:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    # Job count and compiler cache don't change the result
+    args = [arg for arg in build_cmd if not arg.startswith(('-j', 'CCACHE='))]
+    digest.update(' '.join(args).encode())
+    return digest.hexdigest()
 
 class StreamBuild(build_py):
     """Custom build command for STREAM benchmark C code."""
@@ -13,24 +95,45 @@ class StreamBuild(build_py):
         # First run the regular build_py
         build_py.run(self)
         
-        # Navigate to the C source directory
+        # The C source directory
         c_src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pystream', 'c_src')
         
-        # Get the build directory path for the package
-        build_dir = os.path.join(self.build_lib, 'pystream', 'c_src')
+        # Get the build directory path for the package. Editable installs
+        # (PEP 660) run build_py in a throwaway build_lib and import the
+        # package from the source tree, so the executable is built there.
+        editable = getattr(self, 'editable_mode', False)
+        build_dir = c_src_dir if editable else os.path.join(self.build_lib, 'pystream', 'c_src')
+        
+        # Use a prebuilt executable as-is when there is no toolchain to
+        # rebuild it. Executables aren't package data, so build_py never
+        # overwrites what is built below.
+        prebuilt = os.path.join(c_src_dir, 'stream')
+        if shutil.which('make') is None and os.path.isfile(prebuilt):
+            print("make not found, using the prebuilt stream executable")
+            if not editable:
+                os.makedirs(build_dir, exist_ok=True)
+                shutil.copy(prebuilt, build_dir)
+            return
         
-        # Store the current directory
-        cwd = os.getcwd()
+        # Link the executable straight into the build directory instead of
+        # building in the source tree and copying it over. Make can't handle
+        # whitespace in target names, so such paths still go through a copy.
+        # In the source tree the name relative to the Makefile always works.
+        os.makedirs(build_dir, exist_ok=True)
+        target = os.path.join(os.path.abspath(build_dir), 'stream')
+        make_target = 'stream' if editable else target
+        link_in_place = editable or not any(c.isspace() for c in target)
+        target_args = [f'TARGET={make_target}'] if link_in_place else []
+        force_rebuild = os.environ.get('PYSTREAM_FORCE_REBUILD') == '1'
         
         try:
-            # Change to the C source directory
-            os.chdir(c_src_dir)
-            
-            # Run make to build the C program
-            subprocess.check_call(['make', 'clean'])
+            # Make only rebuilds when the sources or flags changed, a clean
+            # build can still be forced through the environment
+            if force_rebuild:
+                run_make(['make', 'clean'] + target_args, c_src_dir)
             
             # Check if libnuma is available
-            numa_available = self._check_numa_available()
+            numa_available = _numa_available()
             
             if numa_available:
                 print("NUMA support detected, building with NUMA support")
@@ -39,63 +142,102 @@ class StreamBuild(build_py):
                 print("NUMA support not detected, building without NUMA support")
                 build_cmd = ['make']
                 
+            # Bake STREAM parameters given in the environment into the
+            # executable as compile-time defaults. STREAM_ARRAY_SIZE and
+            # NTIMES only apply when the executable is run by hand:
+            # StreamBenchmark always passes -s and -i explicitly.
+            defines = _stream_defines()
+            extra_cflags = [f"EXTRA_CFLAGS={' '.join(defines)}"] if defines else []
+                
+            # Use ccache when available so unchanged sources aren't recompiled
+            ccache = shutil.which('ccache')
+            if ccache:
+                build_cmd.append(f'CCACHE={ccache}')
+                
+            # Let make run independent jobs concurrently, one per CPU unless
+            # limited through MAX_JOBS like other source-built packages
+            jobs = int(os.environ.get('MAX_JOBS') or os.cpu_count() or 2)
+            build_cmd.append(f'-j{jobs}')
+                
+            # Skip make entirely when the last build used the same inputs,
+            # e.g. on repeated 'pip install -e .' runs. The key is kept in the
+            # project's build directory, which unlike build_lib survives
+            # editable builds and doesn't end up in the wheel. The target's
+            # mtime is recorded too, so a binary rebuilt or replaced behind
+            # our back isn't mistaken for ours.
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'build')
+            cache_file = os.path.join(cache_dir, '.stream_cache')
+            cache_key = _build_cache_key(c_src_dir, build_cmd + extra_cflags + [target])
+            if not force_rebuild and os.path.exists(target) and os.path.exists(cache_file):
+                with open(cache_file) as f:
+                    if f.read() == f'{cache_key} {os.stat(target).st_mtime_ns}':
+                        print(f"stream executable in {build_dir} is up to date")
+                        return
+                        
             # Build with appropriate configuration
-            subprocess.check_call(build_cmd)
+            run_make(build_cmd + extra_cflags + target_args, c_src_dir)
             
-            # Make sure the build directory exists
-            os.makedirs(build_dir, exist_ok=True)
+            if link_in_place and platform.machine().lower() in ('x86_64', 'amd64'):
+                self._build_simd_variants(build_cmd, defines, make_target, c_src_dir)
             
-            # Copy the built executable to the build directory
-            if os.path.exists('stream'):
-                shutil.copy('stream', build_dir)
-                print(f"Copied stream executable to {build_dir}")
+            if not link_in_place:
+                executable = os.path.join(c_src_dir, 'stream')
+                if os.path.exists(executable):
+                    shutil.copy(executable, build_dir)
+                    
+            if os.path.exists(target):
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_file, 'w') as f:
+                    f.write(f'{cache_key} {os.stat(target).st_mtime_ns}')
+                print(f"Built stream executable in {build_dir}")
             else:
                 print("WARNING: stream executable not found after build!")
             
-            # Move back to the original directory
-            os.chdir(cwd)
-            
         except Exception as e:
             print(f"Error building STREAM benchmark: {e}")
-            os.chdir(cwd)  # Ensure we return to the original directory
             raise
     
-    def _check_numa_available(self):
-        """Check if libnuma is available on the system."""
-        try:
-            # Check if we can find the libnuma library
-            result = subprocess.run(
-                ["ldconfig", "-p"], 
-                capture_output=True, 
-                text=True
-            )
-            if "libnuma.so" in result.stdout:
-                return True
-                
-            # Alternative check for macOS and other systems
-            result = subprocess.run(
-                ["find", "/usr/lib", "/usr/local/lib", "-name", "libnuma*"], 
-                capture_output=True,
-                text=True
-            )
-            if result.stdout.strip():
-                return True
-                
-            # Check for the header file
-            if os.path.exists("/usr/include/numa.h") or os.path.exists("/usr/local/include/numa.h"):
-                return True
-                
-            return False
-        except Exception as e:
-            print(f"Error checking for NUMA support: {e}")
-            return False
+    def _build_simd_variants(self, build_cmd, defines, target, c_src_dir):
+        """Build the SIMD_VARIANTS next to target, skipping the ones the compiler rejects."""
+        for tag, flags in SIMD_VARIANTS:
+            cmd = build_cmd + [
+                f"EXTRA_CFLAGS={' '.join(defines + [flags])}",
+                f'TARGET={target}.{tag}',
+                f'BUILD_CONFIG=.build_config.{tag}',
+            ]
+            try:
+                run_make(cmd, c_src_dir)
+                print(f"Built {tag} variant of the stream executable")
+            except RuntimeError as e:
+                print(f"Skipping {tag} variant of the stream executable: {e}")
 
-# Define packages explicitly, including c_src directory
-packages = find_packages(include=['pystream', 'pystream.*'])
+class StreamDistribution(Distribution):
+    """Distribution that ships the compiled stream executable."""
+    
+    def has_ext_modules(self):
+        # There is no Python extension, but reporting one makes build use
+        # build_platlib and puts the package in the wheel's platlib root,
+        # which auditwheel requires for wheels containing ELF binaries
+        return True
 
-# Ensure pystream.c_src is included
-if 'pystream.c_src' not in packages:
-    packages.append('pystream.c_src')
+cmdclass = {
+    'build_py': StreamBuild,
+}
+
+if bdist_wheel is not None:
+    class StreamWheel(bdist_wheel):
+        """Wheel command that tags wheels as platform specific."""
+        
+        def get_tag(self):
+            # The executable doesn't link against Python, so one wheel per
+            # platform serves every Python 3 version
+            _, _, plat = bdist_wheel.get_tag(self)
+            return 'py3', 'none', plat
+    
+    cmdclass['bdist_wheel'] = StreamWheel
+
+# Define packages explicitly, including c_src directory
+packages = ['pystream', 'pystream.c_src']
 
 setup(
     name="pystream",
@@ -106,8 +248,12 @@ setup(
     packages=packages,
     include_package_data=True,
     package_data={
-        'pystream': ['c_src/*'],
-        'pystream.c_src': ['*'],
+        # Sources only, the executable is built into build_lib by StreamBuild
+        'pystream.c_src': ['*.c', '*.h', 'Makefile'],
+    },
+    # Also keep executables listed in a stale SOURCES.txt out of build_lib
+    exclude_package_data={
+        'pystream.c_src': ['stream', 'stream.avx*'],
     },
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -115,9 +261,8 @@ setup(
         "Operating System :: POSIX :: Linux",
     ],
     python_requires=">=3.6",
-    cmdclass={
-        'build_py': StreamBuild,
-    },
+    cmdclass=cmdclass,
+    distclass=StreamDistribution,
     install_requires=[
         'psutil',  # For process management
     ],
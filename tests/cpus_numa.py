@@ -25,6 +25,10 @@ def main():
         numa_nodes=[0]               # Use only memory from NUMA node 0
     )
     
+    # Place each thread's chunk of the arrays on its local node instead of
+    # letting the main thread's first touch decide
+    stream.set_numa_alloc_mode("onnode")
+    
     # Configure for runtime mode (run for 30 seconds)
     stream.set_runtime(30)
     
@@ -36,23 +40,24 @@ def main():
     if stream.is_running():
         print("STREAM benchmark is running in the background")
     
-    # Monitor while it runs
+    # Monitor while it runs, sampling only what gets printed
+    usage_attrs = ("cpu_percent", "memory_info")
+    line_format = "  {}: {:.2f}".format
     start_time = time.time()
     try:
-        while stream.is_running() and (time.time() - start_time < 30):
+        # Wait for STREAM to exit, sampling every 5 seconds in between. The
+        # wait returns as soon as the benchmark finishes.
+        while not stream.wait(timeout=5) and (time.time() - start_time < 30):
             # Get resource usage information
-            usage = stream.get_resource_usage()
+            usage = stream.get_resource_usage(attrs=usage_attrs)
             
             # Print current status
             print(f"\nSTREAM Benchmark Status (after {time.time() - start_time:.1f} seconds):")
             for key, value in usage.items():
-                print(f"  {key}: {value:.2f}")
+                print(line_format(key, value))
             
             # Do some work here while STREAM runs in the background
             print("\nYour application is running while STREAM creates memory pressure...")
-            
-            # Sleep a bit before checking again
-            time.sleep(5)
     
     except KeyboardInterrupt:
         print("\nUser interrupted, stopping benchmark...")
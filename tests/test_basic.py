@@ -7,32 +7,115 @@ import time
 import os
 import sys
 import subprocess
+import platform
+import tempfile
 from pystream import StreamBenchmark, StreamOperation
+from pystream.benchmark import _cpu_flags
 
 class TestStreamBenchmark(unittest.TestCase):
     """Test the StreamBenchmark class."""
     
+    @classmethod
+    def setUpClass(cls):
+        # Locate the executable once and share it between all tests
+        cls.binary = StreamBenchmark._locate_binary()
+        assert os.path.isfile(cls.binary), f"STREAM executable not found at {cls.binary}"
+    
     def test_initialization(self):
         """Test that the benchmark initializes correctly."""
-        stream = StreamBenchmark()
-        self.assertIsNotNone(stream)
+        stream = StreamBenchmark(self.binary)
+        self.assertEqual(stream.executable, self.binary)
         self.assertFalse(stream.is_running())
+        # Without NUMA nodes the support probe is deferred
+        self.assertIsNone(stream._numa_support)
+    
+    def test_numa_support_cached(self):
+        """Test that the NUMA probe result is shared between instances."""
+        stream = StreamBenchmark(self.binary)
+        numa_support = stream.numa_support
+        key = (stream.executable, os.stat(stream.executable).st_mtime_ns)
+        self.assertEqual(StreamBenchmark._numa_support_cache[key], numa_support)
+        
+        # A second instance must reuse the cached result
+        StreamBenchmark._numa_support_cache[key] = not numa_support
+        try:
+            self.assertEqual(StreamBenchmark(self.binary).numa_support, not numa_support)
+        finally:
+            StreamBenchmark._numa_support_cache[key] = numa_support
+    
+    def test_select_variant(self):
+        """Test that the best SIMD variant supported by the CPU is picked."""
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, "stream")
+            self.assertEqual(StreamBenchmark._select_variant(base), base)
+            
+            for tag in ("avx2", "avx512"):
+                open(f"{base}.{tag}", "w").close()
+            flags = _cpu_flags()
+            if platform.machine().lower() not in ("x86_64", "amd64"):
+                expected = base
+            elif {"avx512f", "avx512dq"} <= flags:
+                expected = f"{base}.avx512"
+            elif {"avx2", "fma"} <= flags:
+                expected = f"{base}.avx2"
+            else:
+                expected = base
+            self.assertEqual(StreamBenchmark._select_variant(base), expected)
+    
+    def test_build_command_cached(self):
+        """Test that the command is rebuilt only after a configuration change."""
+        stream = StreamBenchmark(self.binary, threads=2, array_size=10000)
+        cmd = stream.build_command()
+        self.assertFalse(stream._cmd_dirty)
+        self.assertEqual(stream.build_command(), cmd)
+        
+        # Mutating the returned list must not leak into the cache
+        cmd.append("-x")
+        self.assertNotIn("-x", stream.build_command())
+        
+        stream.set_runtime(5)
+        self.assertIn("-r", stream.build_command())
+        stream.threads = 3
+        self.assertEqual(stream.build_command()[2], "3")
+        
+        # CPU lists can't be edited in place behind the cache's back
+        stream.set_cpu_affinity([0])
+        with self.assertRaises(AttributeError):
+            stream.cpus.append(1)
+        stream.cpus = stream.cpus + (1,)
+        self.assertEqual(stream.build_command()[-1], "0,1")
+    
+    def test_numa_alloc_mode(self):
+        """Test node-local allocation with parallel first touch."""
+        stream = StreamBenchmark(self.binary, threads=2, array_size=10000)
+        self.assertNotIn("-l", stream.build_command())
+        with self.assertRaises(ValueError):
+            stream.set_numa_alloc_mode("interleave")
+        
+        stream.set_numa_alloc_mode("onnode")
+        self.assertIn("-l", stream.build_command())
+        result = stream.start(blocking=True)
+        self.assertEqual(result.returncode, 0)
     
     def test_blocking_run(self):
         """Test running the benchmark in blocking mode."""
         stream = StreamBenchmark(
+            self.binary,
             threads=2,
-            array_size=10000,  # Small array for quick test
-            operation=StreamOperation.COPY
+            array_size=10000  # Small array for quick test
         )
         # Run with small number of iterations for quick test
         stream.set_silent_mode(True)
-        result = stream.start(blocking=True)
-        self.assertEqual(result.returncode, 0)
+        for operation in StreamOperation:
+            with self.subTest(operation=operation):
+                stream.operation = operation
+                result = stream.start(blocking=True)
+                self.assertEqual(result.returncode, 0)
     
     def test_non_blocking_run(self):
         """Test running the benchmark in non-blocking mode."""
         stream = StreamBenchmark(
+            self.binary,
             threads=2,
             array_size=10000,  # Small array for quick test
             operation=StreamOperation.COPY
@@ -44,8 +127,8 @@ class TestStreamBenchmark(unittest.TestCase):
         # Check that it's running
         self.assertTrue(stream.is_running())
         
-        # Wait for it to finish
-        time.sleep(1)
+        # Wait for it to finish, but no longer than needed
+        self.assertTrue(stream.wait(timeout=2.0))
         
         # Should be done now
         self.assertFalse(stream.is_running())
@@ -53,8 +136,9 @@ class TestStreamBenchmark(unittest.TestCase):
     def test_stop(self):
         """Test stopping the benchmark."""
         stream = StreamBenchmark(
+            self.binary,
             threads=2,
-            array_size=100000,  # Larger array so it won't finish immediately
+            array_size=10000,  # Runtime mode keeps it running regardless of size
             operation=StreamOperation.TRIAD
         )
         # Set to run for a long time
@@ -70,11 +154,25 @@ class TestStreamBenchmark(unittest.TestCase):
         # Should be stopped now
         self.assertFalse(stream.is_running())
     
+    @unittest.skipUnless(os.path.isdir("/proc/self/fd"), "requires procfs")
+    def test_no_fd_leak(self):
+        """Test that repeated start/stop cycles don't accumulate file descriptors."""
+        stream = StreamBenchmark(self.binary, threads=1, array_size=10000)
+        stream.set_runtime(10)
+        
+        fds_before = len(os.listdir("/proc/self/fd"))
+        for _ in range(5):
+            stream.start(blocking=False)
+            stream.stop()
+        self.assertIsNone(stream.process)
+        self.assertEqual(len(os.listdir("/proc/self/fd")), fds_before)
+    
     def test_resource_usage(self):
         """Test getting resource usage information."""
         stream = StreamBenchmark(
+            self.binary,
             threads=2,
-            array_size=100000,
+            array_size=10000,
             operation=StreamOperation.TRIAD
         )
         stream.set_runtime(3)
@@ -90,8 +188,130 @@ class TestStreamBenchmark(unittest.TestCase):
         self.assertIn('cpu_percent', usage)
         self.assertIn('memory_rss_mb', usage)
         
+        # Only the requested attributes are sampled
+        usage = stream.get_resource_usage(attrs=("cpu_percent",))
+        self.assertEqual(list(usage), ['cpu_percent'])
+        with self.assertRaises(ValueError):
+            stream.get_resource_usage(attrs=("open_files",))
+        
         # Clean up
         stream.stop()
+    
+    def test_resource_usage_batch(self):
+        """Test sampling several benchmarks at once."""
+        streams = [
+            StreamBenchmark(self.binary, threads=1, array_size=10000, operation=StreamOperation.TRIAD)
+            for _ in range(2)
+        ]
+        idle = StreamBenchmark(self.binary)
+        for stream in streams:
+            stream.set_runtime(3)
+            stream.start(blocking=False)
+        
+        try:
+            time.sleep(0.5)
+            usages = StreamBenchmark.get_resource_usage_batch(streams + [idle])
+            self.assertEqual(len(usages), 3)
+            for usage in usages[:2]:
+                self.assertIn('cpu_percent', usage)
+                self.assertIn('memory_rss_mb', usage)
+            # Instances that are not running report nothing
+            self.assertEqual(usages[2], {})
+        finally:
+            for stream in streams:
+                stream.stop()
+    
+    @unittest.skipUnless(hasattr(os, "sched_getaffinity"), "requires sched_getaffinity")
+    def test_spawn_affinity(self):
+        """Test that the child starts confined to the requested CPUs."""
+        cpu = min(os.sched_getaffinity(0))
+        before = os.sched_getaffinity(0)
+        stream = StreamBenchmark(self.binary, threads=1, array_size=10000, cpus=[cpu])
+        stream.set_runtime(1)
+        stream.start(blocking=False)
+        try:
+            self.assertEqual(os.sched_getaffinity(stream.process.pid), {cpu})
+            # The calling thread gets its original mask back
+            self.assertEqual(os.sched_getaffinity(0), before)
+        finally:
+            stream.stop()
+        
+        # CPU IDs the kernel can't represent only produce a warning
+        with self.assertLogs("pystream.benchmark", level="WARNING"):
+            with stream._spawn_affinity([2 ** 70]):
+                self.assertEqual(os.sched_getaffinity(0), before)
+    
+    def test_invalid_cpu_ids(self):
+        """Test that invalid CPU IDs are rejected when they are set."""
+        stream = StreamBenchmark(self.binary)
+        for cpus in ([-1], [0, "1"], [1.5]):
+            with self.assertRaises(ValueError):
+                stream.set_cpu_affinity(cpus)
+            with self.assertRaises(ValueError):
+                stream.set_cpu_groups([[0], cpus])
+        self.assertIsNone(stream.cpus)
+    
+    def test_replicas(self):
+        """Test running several STREAM processes from one benchmark."""
+        stream = StreamBenchmark(
+            self.binary,
+            threads=1,
+            array_size=10000,
+            operation=StreamOperation.ADD,
+            replicas=2
+        )
+        results = stream.start(blocking=True)
+        self.assertEqual([result.returncode for result in results], [0, 0])
+        
+        stream.set_runtime(10)
+        stream.start(blocking=False)
+        try:
+            self.assertEqual(len(stream.processes), 2)
+            self.assertTrue(stream.is_running())
+            self.assertIn('cpu_percent', stream.get_resource_usage())
+        finally:
+            stream.stop()
+        self.assertFalse(stream.is_running())
+        self.assertEqual(stream.processes, [])
+    
+    def test_cpu_groups(self):
+        """Test that each replica is pinned to its own CPU group."""
+        stream = StreamBenchmark(self.binary, cpu_groups=[[0], [1, 2]])
+        self.assertEqual(stream.replicas, 2)
+        self.assertEqual(stream.build_command(0)[-2:], ["-a", "0"])
+        self.assertEqual(stream.build_command(1)[-2:], ["-a", "1,2"])
+        
+        # Clearing the groups goes back to a single unpinned replica
+        stream.set_cpu_groups(None)
+        self.assertEqual(stream.replicas, 1)
+        self.assertNotIn("-a", stream.build_command())
+        
+        with self.assertRaises(ValueError):
+            StreamBenchmark(self.binary, replicas=3, cpu_groups=[[0], [1]])
+    
+    def test_failure_logged(self):
+        """Test that a failing background run reports its stderr."""
+        stream = StreamBenchmark(
+            self.binary,
+            threads=0,  # Rejected by the STREAM executable
+            array_size=10000
+        )
+        with self.assertLogs("pystream.benchmark", level="ERROR") as logs:
+            stream.start(blocking=False)
+            stream.monitor_thread.join(timeout=5)
+        
+        self.assertIn("Number of threads must be at least 1", logs.output[0])
+    
+    def test_failure_logged_while_polled(self):
+        """Test that a failure is still reported while another thread polls the process."""
+        for _ in range(20):
+            stream = StreamBenchmark(self.binary, threads=0, array_size=10000)
+            with self.assertLogs("pystream.benchmark", level="ERROR"):
+                stream.start(blocking=False)
+                # Contend with the monitor thread for Popen's wait lock
+                while stream.is_running():
+                    pass
+                stream.monitor_thread.join(timeout=5)
 
 if __name__ == '__main__':
     unittest.main()